@@ -0,0 +1,38 @@
+"""Directory-listing cache for the fixed-name filesystem probes made by the scripts."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, FrozenSet
+
+
+class FsSnapshot:
+    """Answers existence probes from one cached listing per parent directory.
+
+    Only entries that Path.exists() would accept are kept, so dangling symlinks
+    do not count. Names match exactly, which is case-sensitive even on
+    case-insensitive filesystems where a direct stat would not be.
+    """
+
+    def __init__(self) -> None:
+        self._dir_cache: Dict[str, FrozenSet[str]] = {}
+
+    def entries(self, directory: Path) -> FrozenSet[str]:
+        key = str(directory)
+        names = self._dir_cache.get(key)
+        if names is None:
+            try:
+                with os.scandir(key) as entries:
+                    names = frozenset(
+                        entry.name
+                        for entry in entries
+                        if not entry.is_symlink() or os.path.exists(entry.path)
+                    )
+            except OSError:
+                names = frozenset()
+            self._dir_cache[key] = names
+        return names
+
+    def has(self, path: Path) -> bool:
+        return path.name in self.entries(path.parent)
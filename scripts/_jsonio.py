@@ -0,0 +1,53 @@
+"""JSON helpers shared by the scripts: cached package.json loading and report encoding."""
+
+from __future__ import annotations
+
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@lru_cache(maxsize=32)
+def _load(path_str: str, mtime_ns: int) -> Dict[str, object]:
+    try:
+        with open(path_str, "rb") as handle:
+            raw = handle.read()
+    except OSError:
+        return {}
+
+    try:
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw)
+    except ValueError:
+        return {}
+
+
+def load_package_json(project_root: Path) -> Dict[str, object]:
+    """Return parsed package.json, reusing the cached parse while its mtime is unchanged.
+
+    The returned object is shared between callers and must not be mutated.
+    """
+    package_json = project_root / "package.json"
+    try:
+        mtime_ns = os.stat(package_json).st_mtime_ns
+    except OSError:
+        return {}
+    return _load(str(package_json), mtime_ns)
+
+
+def dumps(data: object) -> str:
+    """Encode data as ASCII-only JSON indented by two spaces, using orjson when installed."""
+    if orjson is not None:
+        text = orjson.dumps(data, option=orjson.OPT_INDENT_2).decode("utf-8")
+        # orjson always emits raw UTF-8; keep the \uXXXX escaping callers rely on.
+        if text.isascii():
+            return text
+    return json.dumps(data, ensure_ascii=True, indent=2)
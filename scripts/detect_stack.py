@@ -7,7 +7,10 @@ import argparse
 import json
 import os
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import AbstractSet, Dict, List, Optional, Tuple
+
+from _fscache import FsSnapshot
+from _jsonio import dumps, load_package_json
 
 EXCLUDED_DIRS = {
     "node_modules",
@@ -21,21 +24,37 @@ EXCLUDED_DIRS = {
     ".turbo",
 }
 
+SUFFIX_KEYS = {
+    ".ts": "ts",
+    ".tsx": "tsx",
+    ".js": "js",
+    ".jsx": "jsx",
+    ".vue": "vue",
+    ".svelte": "svelte",
+    ".scss": "scss",
+    ".less": "less",
+    ".css": "css",
+}
 
-def error(message: str, code: int = 2) -> int:
-    print(json.dumps({"error": message}, ensure_ascii=True))
-    return code
+MODULE_SUFFIX_KEYS = (
+    (".module.css", "module_css"),
+    (".module.scss", "module_scss"),
+    (".module.less", "module_less"),
+)
+MODULE_SUFFIXES = tuple(module_suffix for module_suffix, _ in MODULE_SUFFIX_KEYS)
 
+LOCKFILES = (
+    ("pnpm-lock.yaml", "pnpm"),
+    ("yarn.lock", "yarn"),
+    ("package-lock.json", "npm"),
+    ("bun.lockb", "bun"),
+    ("bun.lock", "bun"),
+)
 
-def load_package_json(project_root: Path) -> Dict[str, object]:
-    package_json = project_root / "package.json"
-    if not package_json.exists():
-        return {}
 
-    try:
-        return json.loads(package_json.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
-        return {}
+def error(message: str, code: int = 2) -> int:
+    print(json.dumps({"error": message}, ensure_ascii=True))
+    return code
 
 
 def gather_source_stats(project_root: Path, max_files: int = 4000) -> Dict[str, int]:
@@ -55,48 +74,61 @@ def gather_source_stats(project_root: Path, max_files: int = 4000) -> Dict[str,
     }
 
     scanned = 0
-    for current_root, dirs, files in os.walk(project_root):
-        dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
-
-        for filename in files:
-            if scanned >= max_files:
-                return counts
-            scanned += 1
-
-            path = Path(current_root) / filename
-            suffix = path.suffix.lower()
-            lower_name = filename.lower()
-
-            if suffix == ".ts":
-                counts["ts"] += 1
-            elif suffix == ".tsx":
-                counts["tsx"] += 1
-            elif suffix == ".js":
-                counts["js"] += 1
-            elif suffix == ".jsx":
-                counts["jsx"] += 1
-            elif suffix == ".vue":
-                counts["vue"] += 1
-            elif suffix == ".svelte":
-                counts["svelte"] += 1
-            elif suffix == ".scss":
-                counts["scss"] += 1
-            elif suffix == ".less":
-                counts["less"] += 1
-            elif suffix == ".css":
-                counts["css"] += 1
-
-            if lower_name.endswith(".module.css"):
-                counts["module_css"] += 1
-            elif lower_name.endswith(".module.scss"):
-                counts["module_scss"] += 1
-            elif lower_name.endswith(".module.less"):
-                counts["module_less"] += 1
+    stack = [str(project_root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if name not in EXCLUDED_DIRS:
+                            stack.append(entry.path)
+                        continue
+
+                    if scanned >= max_files:
+                        return counts
+                    scanned += 1
+
+                    lower_name = name if name.islower() else name.lower()
+                    dot = lower_name.rfind(".")
+                    key = SUFFIX_KEYS.get(lower_name[dot:]) if dot > 0 else None
+                    if key:
+                        counts[key] += 1
+
+                    if lower_name.endswith(MODULE_SUFFIXES):
+                        for module_suffix, module_key in MODULE_SUFFIX_KEYS:
+                            if lower_name.endswith(module_suffix):
+                                counts[module_key] += 1
+                                break
+        except OSError:
+            continue
 
     return counts
 
 
-def detect_framework(project_root: Path, deps: Dict[str, str]) -> Tuple[str, float, List[str], Dict[str, float]]:
+class LazySourceStats:
+    """Source file counts, walked on first access so detectors that can decide without them skip the scan."""
+
+    def __init__(self, project_root: Path) -> None:
+        self._project_root = project_root
+        self._counts: Optional[Dict[str, int]] = None
+
+    def __getitem__(self, key: str) -> int:
+        if self._counts is None:
+            self._counts = gather_source_stats(self._project_root)
+        return self._counts[key]
+
+    @property
+    def counts(self) -> Optional[Dict[str, int]]:
+        return self._counts
+
+
+def detect_framework(
+    project_root: Path,
+    fs: FsSnapshot,
+    dep_names: AbstractSet[str],
+    has_taro: bool,
+) -> Tuple[str, float, List[str], Dict[str, float]]:
     scores = {
         "next": 0.0,
         "react": 0.0,
@@ -112,8 +144,6 @@ def detect_framework(project_root: Path, deps: Dict[str, str]) -> Tuple[str, flo
         scores[name] += points
         evidence[name].append(reason)
 
-    dep_names = set(deps.keys())
-
     if "next" in dep_names:
         add("next", 1.2, "dependency: next")
     if "react" in dep_names:
@@ -130,7 +160,7 @@ def detect_framework(project_root: Path, deps: Dict[str, str]) -> Tuple[str, flo
     if "vue-router" in dep_names:
         add("vue", 0.2, "dependency: vue-router")
 
-    if any(dep.startswith("@tarojs/") for dep in dep_names):
+    if has_taro:
         add("taro", 1.3, "dependency: @tarojs/*")
 
     if "svelte" in dep_names:
@@ -138,18 +168,18 @@ def detect_framework(project_root: Path, deps: Dict[str, str]) -> Tuple[str, flo
     if "@sveltejs/kit" in dep_names:
         add("svelte", 0.5, "dependency: @sveltejs/kit")
 
-    if (project_root / "next.config.js").exists() or (project_root / "next.config.mjs").exists():
+    if fs.has(project_root / "next.config.js") or fs.has(project_root / "next.config.mjs"):
         add("next", 0.4, "config: next.config.*")
-    if (project_root / "nuxt.config.ts").exists() or (project_root / "nuxt.config.js").exists():
+    if fs.has(project_root / "nuxt.config.ts") or fs.has(project_root / "nuxt.config.js"):
         add("nuxt", 0.4, "config: nuxt.config.*")
-    if (project_root / "src/app").exists() or (project_root / "app").exists():
+    if fs.has(project_root / "src/app") or fs.has(project_root / "app"):
         add("next", 0.3, "dir: app router structure")
-    if (project_root / "pages").exists() or (project_root / "src/pages").exists():
+    if fs.has(project_root / "pages") or fs.has(project_root / "src/pages"):
         add("next", 0.1, "dir: pages structure")
         add("react", 0.1, "dir: pages structure")
         add("nuxt", 0.1, "dir: pages structure")
 
-    if (project_root / "config/index.ts").exists() or (project_root / "config/index.js").exists():
+    if fs.has(project_root / "config/index.ts") or fs.has(project_root / "config/index.js"):
         add("taro", 0.3, "config: taro-like config/index.*")
 
     ordered = sorted(scores.items(), key=lambda x: x[1], reverse=True)
@@ -168,15 +198,15 @@ def detect_framework(project_root: Path, deps: Dict[str, str]) -> Tuple[str, flo
     return top_name, confidence, evidence[top_name], scores
 
 
-def detect_language(project_root: Path, source_stats: Dict[str, int]) -> Tuple[str, List[str]]:
+def detect_language(project_root: Path, fs: FsSnapshot, source_stats: LazySourceStats) -> Tuple[str, List[str]]:
     evidence: List[str] = []
-    ts_total = source_stats["ts"] + source_stats["tsx"]
-    js_total = source_stats["js"] + source_stats["jsx"]
-
-    if (project_root / "tsconfig.json").exists():
+    if fs.has(project_root / "tsconfig.json"):
         evidence.append("file: tsconfig.json")
         return "typescript", evidence
 
+    ts_total = source_stats["ts"] + source_stats["tsx"]
+    js_total = source_stats["js"] + source_stats["jsx"]
+
     if ts_total > js_total:
         evidence.append(f"source: ts files {ts_total} > js files {js_total}")
         return "typescript", evidence
@@ -185,8 +215,9 @@ def detect_language(project_root: Path, source_stats: Dict[str, int]) -> Tuple[s
     return "javascript", evidence
 
 
-def detect_style_system(project_root: Path, deps: Dict[str, str], source_stats: Dict[str, int]) -> Tuple[str, List[str], float]:
-    dep_names = set(deps.keys())
+def detect_style_system(
+    project_root: Path, fs: FsSnapshot, dep_names: AbstractSet[str], source_stats: LazySourceStats
+) -> Tuple[str, List[str], float]:
     scores = {
         "tailwind": 0.0,
         "css-modules": 0.0,
@@ -204,22 +235,19 @@ def detect_style_system(project_root: Path, deps: Dict[str, str], source_stats:
 
     if "tailwindcss" in dep_names:
         add("tailwind", 1.0, "dependency: tailwindcss")
-    if (project_root / "tailwind.config.js").exists() or (project_root / "tailwind.config.ts").exists():
+    if fs.has(project_root / "tailwind.config.js") or fs.has(project_root / "tailwind.config.ts"):
         add("tailwind", 0.5, "config: tailwind.config.*")
 
-    module_total = (
-        source_stats["module_css"]
-        + source_stats["module_scss"]
-        + source_stats["module_less"]
-    )
-    if module_total > 0:
-        add("css-modules", 0.9, f"source: module style files {module_total}")
-
-    if source_stats["scss"] > 0 or "sass" in dep_names:
+    # Points that only source files can still award, by style system.
+    source_points = {"css-modules": 0.9}
+    if "sass" in dep_names:
         add("scss", 0.7, "source/dependency: scss or sass")
-
-    if source_stats["less"] > 0 or "less" in dep_names:
+    else:
+        source_points["scss"] = 0.7
+    if "less" in dep_names:
         add("less", 0.7, "source/dependency: less")
+    else:
+        source_points["less"] = 0.7
 
     if "styled-components" in dep_names:
         add("styled-components", 1.0, "dependency: styled-components")
@@ -227,6 +255,23 @@ def detect_style_system(project_root: Path, deps: Dict[str, str], source_stats:
     if "@emotion/react" in dep_names or "@emotion/styled" in dep_names:
         add("emotion", 1.0, "dependency: emotion")
 
+    # Only walk the source tree when its counts could change the winner or
+    # pull a runner-up within the confidence margin below.
+    leader = max(scores.values())
+    ceiling = max(scores[name] + points for name, points in source_points.items())
+    if leader - ceiling < 0.2:
+        module_total = (
+            source_stats["module_css"]
+            + source_stats["module_scss"]
+            + source_stats["module_less"]
+        )
+        if module_total > 0:
+            add("css-modules", 0.9, f"source: module style files {module_total}")
+        if "scss" in source_points and source_stats["scss"] > 0:
+            add("scss", 0.7, "source/dependency: scss or sass")
+        if "less" in source_points and source_stats["less"] > 0:
+            add("less", 0.7, "source/dependency: less")
+
     ordered = sorted(scores.items(), key=lambda x: x[1], reverse=True)
     top_name, top_score = ordered[0]
     second_score = ordered[1][1] if len(ordered) > 1 else 0.0
@@ -239,15 +284,10 @@ def detect_style_system(project_root: Path, deps: Dict[str, str], source_stats:
     return top_name, evidence[top_name], confidence
 
 
-def detect_package_manager(project_root: Path) -> Tuple[str, List[str]]:
-    if (project_root / "pnpm-lock.yaml").exists():
-        return "pnpm", ["file: pnpm-lock.yaml"]
-    if (project_root / "yarn.lock").exists():
-        return "yarn", ["file: yarn.lock"]
-    if (project_root / "package-lock.json").exists():
-        return "npm", ["file: package-lock.json"]
-    if (project_root / "bun.lockb").exists() or (project_root / "bun.lock").exists():
-        return "bun", ["file: bun lock"]
+def detect_package_manager(top_entries: AbstractSet[str]) -> Tuple[str, List[str]]:
+    for lockfile, manager in LOCKFILES:
+        if lockfile in top_entries:
+            return manager, [f"file: {lockfile}"]
     return "npm", ["fallback: no lockfile"]
 
 
@@ -279,15 +319,21 @@ def main() -> int:
     deps = {}
     if isinstance(package_data, dict):
         for key in ("dependencies", "devDependencies", "peerDependencies"):
-            block = package_data.get(key, {})
+            block = package_data.get(key)
             if isinstance(block, dict):
-                deps.update({str(k): str(v) for k, v in block.items()})
+                deps.update(block)
+
+    fs = FsSnapshot()
 
-    source_stats = gather_source_stats(project_root)
-    framework, fw_confidence, fw_evidence, fw_scores = detect_framework(project_root, deps)
-    language, language_evidence = detect_language(project_root, source_stats)
-    style_system, style_evidence, style_confidence = detect_style_system(project_root, deps, source_stats)
-    package_manager, pm_evidence = detect_package_manager(project_root)
+    dep_names = deps.keys()
+    has_taro = any(name.startswith("@tarojs/") for name in dep_names)
+
+    source_stats = LazySourceStats(project_root)
+    framework, fw_confidence, fw_evidence, fw_scores = detect_framework(
+        project_root, fs, dep_names, has_taro
+    )
+    language, language_evidence = detect_language(project_root, fs, source_stats)
+    package_manager, pm_evidence = detect_package_manager(fs.entries(project_root))
 
     overrides = {}
     if args.framework != "auto":
@@ -296,11 +342,17 @@ def main() -> int:
         fw_evidence = [f"override: framework={args.framework}"]
         fw_confidence = 0.99
 
+    # Style detection is the only remaining reader of source_stats; with an
+    # explicit override its result would be discarded, so skip it (and the walk).
     if args.style != "auto":
         style_system = args.style
         overrides["style_system"] = args.style
         style_evidence = [f"override: style={args.style}"]
         style_confidence = 0.99
+    else:
+        style_system, style_evidence, style_confidence = detect_style_system(
+            project_root, fs, dep_names, source_stats
+        )
 
     if not fw_evidence:
         fw_evidence = [f"fallback: framework={framework}"]
@@ -323,14 +375,14 @@ def main() -> int:
         },
         "diagnostics": {
             "framework_scores": {k: round(v, 2) for k, v in fw_scores.items()},
-            "source_stats": source_stats,
+            "source_stats": source_stats.counts,
         },
     }
 
     if overrides:
         output["overrides"] = overrides
 
-    print(json.dumps(output, ensure_ascii=True, indent=2))
+    print(dumps(output))
     return 0
 
 
@@ -7,17 +7,67 @@ import argparse
 import json
 import re
 from collections import Counter
+from heapq import nlargest
 from html.parser import HTMLParser
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Set
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as FastHTMLParser
+except ImportError:
+    FastHTMLParser = None
+
+from _jsonio import dumps
 
 SEMANTIC_TAGS = {"header", "main", "section", "footer", "nav", "article", "aside", "form"}
 INTERACTIVE_TAGS = {"button", "a", "input", "select", "textarea", "summary"}
+VOID_TAGS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "source",
+    "track",
+    "wbr",
+}
+READ_CHUNK_SIZE = 64 * 1024
+EMPTY_ATTRS: Mapping[str, Optional[str]] = MappingProxyType({})
+# Tags the tree builder inserts when a draft leaves them out. Comments and
+# raw-text elements are matched first so tag-like text inside them is skipped.
+INSERTABLE_TAGS = ("html", "head", "body", "tbody")
+SOURCE_TAG_RE = re.compile(
+    rb"<!--.*?(?:-->|\Z)"
+    rb"|<(script|style|textarea|title)\b.*?(?:</\1\s*>|\Z)"
+    rb"|<(html|head|body|tbody)[\s/>]",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# One pattern per family, each capturing the token in group 1, so every family
+# only skips text consumed by its own previous match.
+TOKEN_PATTERNS = {
+    "colors": re.compile(r"(#(?:[0-9a-fA-F]{3,8})\b|rgba?\([^)]*\)|hsla?\([^)]*\))"),
+    "font_sizes": re.compile(r"font-size\s*:\s*([^;}{]+)", re.IGNORECASE),
+    "spacings": re.compile(
+        r"(?:margin|padding|gap|row-gap|column-gap)\s*:\s*([^;}{]+)",
+        re.IGNORECASE,
+    ),
+    "radii": re.compile(r"border-radius\s*:\s*([^;}{]+)", re.IGNORECASE),
+    "shadows": re.compile(r"box-shadow\s*:\s*([^;}{]+)", re.IGNORECASE),
+}
 
 
-class DraftInspector(HTMLParser):
+class DraftSignals:
+    """Structural and visual signals collected from a draft, whichever parser produced them."""
+
     def __init__(self) -> None:
-        super().__init__()
         self.tag_counter: Counter[str] = Counter()
         self.class_counter: Counter[str] = Counter()
         self.semantic_sections: Counter[str] = Counter()
@@ -27,17 +77,13 @@ class DraftInspector(HTMLParser):
         self.scripts: List[str] = []
         self.inline_styles: List[str] = []
         self.style_blocks: List[str] = []
-        self._in_style = False
-        self._style_buffer: List[str] = []
-        self.stack: List[str] = []
         self.root_children: List[Dict[str, str]] = []
 
-    def handle_starttag(self, tag: str, attrs):
-        attrs_dict = {k: v for k, v in attrs}
-
+    def record_element(self, tag: str, attrs_dict: Mapping[str, Optional[str]], parent: str) -> None:
         self.tag_counter[tag] += 1
 
-        class_attr = attrs_dict.get("class")
+        element_id = attrs_dict.get("id", "")
+        class_attr = attrs_dict.get("class", "")
         if class_attr:
             for cls in class_attr.split():
                 self.class_counter[cls] += 1
@@ -45,13 +91,14 @@ class DraftInspector(HTMLParser):
         if tag in SEMANTIC_TAGS:
             self.semantic_sections[tag] += 1
 
-        if tag in INTERACTIVE_TAGS or attrs_dict.get("onclick") or attrs_dict.get("role") == "button":
+        role = attrs_dict.get("role", "")
+        if tag in INTERACTIVE_TAGS or role == "button" or attrs_dict.get("onclick"):
             self.interactive_elements.append(
                 {
                     "tag": tag,
-                    "id": attrs_dict.get("id", ""),
-                    "class": attrs_dict.get("class", ""),
-                    "role": attrs_dict.get("role", ""),
+                    "id": element_id,
+                    "class": class_attr,
+                    "role": role,
                 }
             )
 
@@ -68,38 +115,66 @@ class DraftInspector(HTMLParser):
         if style_attr:
             self.inline_styles.append(style_attr)
 
-        parent = self.stack[-1] if self.stack else ""
         if parent == "body" and len(self.root_children) < 30:
             self.root_children.append(
                 {
                     "tag": tag,
-                    "id": attrs_dict.get("id", ""),
-                    "class": attrs_dict.get("class", ""),
+                    "id": element_id,
+                    "class": class_attr,
                 }
             )
 
+    def record_style_block(self, text: str) -> None:
+        text = text.strip()
+        if text:
+            self.style_blocks.append(text)
+
+
+class DraftInspector(HTMLParser):
+    """Pure-Python fallback used when selectolax (lexbor backend) is not installed."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.signals = DraftSignals()
+        self._in_style = False
+        self._style_buffer: List[str] = []
+        self.stack: List[str] = []
+
+    def _record_tag(self, tag: str, attrs, push: bool) -> None:
+        attrs_dict = dict(attrs) if attrs else EMPTY_ATTRS
+
+        parent = self.stack[-1] if self.stack else ""
+        self.signals.record_element(tag, attrs_dict, parent)
+
         if tag == "style":
             self._in_style = True
             self._style_buffer = []
 
-        self.stack.append(tag)
+        if push:
+            self.stack.append(tag)
+
+    def handle_starttag(self, tag: str, attrs):
+        # Void elements never get an end tag, so keeping them on the stack would
+        # hide their later siblings' real parent.
+        self._record_tag(tag, attrs, tag not in VOID_TAGS)
 
     def handle_startendtag(self, tag, attrs):
-        self.handle_starttag(tag, attrs)
-        if self.stack and self.stack[-1] == tag:
-            self.stack.pop()
+        self._record_tag(tag, attrs, False)
 
     def handle_endtag(self, tag: str):
         if tag == "style" and self._in_style:
             self._in_style = False
-            text = "".join(self._style_buffer).strip()
-            if text:
-                self.style_blocks.append(text)
+            self.signals.record_style_block("".join(self._style_buffer))
             self._style_buffer = []
 
-        for idx in range(len(self.stack) - 1, -1, -1):
-            if self.stack[idx] == tag:
-                del self.stack[idx]
+        stack = self.stack
+        if stack and stack[-1] == tag:
+            stack.pop()
+            return
+
+        for idx in range(len(stack) - 2, -1, -1):
+            if stack[idx] == tag:
+                del stack[idx]
                 break
 
     def handle_data(self, data: str):
@@ -107,7 +182,66 @@ class DraftInspector(HTMLParser):
             self._style_buffer.append(data)
 
 
-def unique_limited(items: List[str], limit: int = 40) -> List[str]:
+def inserted_tags(raw_html: bytes) -> Set[str]:
+    present = {
+        match.group(2).lower().decode("ascii")
+        for match in SOURCE_TAG_RE.finditer(raw_html)
+        if match.group(2)
+    }
+    return {name for name in INSERTABLE_TAGS if name not in present}
+
+
+def inspect_tree(raw_html: bytes) -> DraftSignals:
+    """Collect signals from the lexbor tree.
+
+    Elements the tree builder inserted are left out and their children are
+    attributed to the nearest real ancestor, as the html.parser fallback sees
+    them. A tbody is only kept when the draft spells one out somewhere.
+
+    Template content is kept outside the lexbor tree and is skipped, whereas
+    the fallback counts it. Drafts that rely on error recovery (misnested or
+    unclosed tags) can also be attributed to different parents.
+    """
+    signals = DraftSignals()
+    root = FastHTMLParser(raw_html).root
+    if root is None:
+        return signals
+
+    implied = inserted_tags(raw_html)
+
+    for node in root.traverse(include_text=False):
+        tag = node.tag
+        if not tag or tag[0] in "-_!#" or tag in implied:
+            continue
+        parent = node.parent
+        while parent is not None and parent.tag in implied:
+            parent = parent.parent
+        parent_tag = parent.tag if parent is not None else ""
+        if parent_tag[:1] in ("-", "_", "!", "#"):
+            parent_tag = ""
+        signals.record_element(tag, node.attributes, parent_tag)
+        if tag == "style":
+            signals.record_style_block(node.text(deep=True))
+    return signals
+
+
+def collect_signals(html_path: Path) -> DraftSignals:
+    if FastHTMLParser is not None:
+        # selectolax decodes bytes itself, so skip the intermediate str copy.
+        return inspect_tree(html_path.read_bytes())
+
+    inspector = DraftInspector()
+    with html_path.open("r", encoding="utf-8", errors="replace") as handle:
+        while True:
+            chunk = handle.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            inspector.feed(chunk)
+    inspector.close()
+    return inspector.signals
+
+
+def unique_limited(items: Iterable[str], limit: int = 40) -> List[str]:
     seen = set()
     result = []
     for item in items:
@@ -123,23 +257,12 @@ def unique_limited(items: List[str], limit: int = 40) -> List[str]:
     return result
 
 
-def extract_tokens(css_text: str) -> Dict[str, List[str]]:
-    colors = re.findall(r"#(?:[0-9a-fA-F]{3,8})\b|rgba?\([^)]*\)|hsla?\([^)]*\)", css_text)
-    font_sizes = re.findall(r"font-size\s*:\s*([^;}{]+)", css_text, flags=re.IGNORECASE)
-    spacings = re.findall(
-        r"(?:margin|padding|gap|row-gap|column-gap)\s*:\s*([^;}{]+)",
-        css_text,
-        flags=re.IGNORECASE,
-    )
-    radii = re.findall(r"border-radius\s*:\s*([^;}{]+)", css_text, flags=re.IGNORECASE)
-    shadows = re.findall(r"box-shadow\s*:\s*([^;}{]+)", css_text, flags=re.IGNORECASE)
-
+def extract_tokens(css_text: str, limit: int = 40) -> Dict[str, List[str]]:
+    # finditer is consumed lazily, so each family stops scanning as soon as it
+    # holds `limit` unique values.
     return {
-        "colors": unique_limited(colors),
-        "font_sizes": unique_limited(font_sizes),
-        "spacings": unique_limited(spacings),
-        "radii": unique_limited(radii),
-        "shadows": unique_limited(shadows),
+        key: unique_limited(map(itemgetter(1), pattern.finditer(css_text)), limit=limit)
+        for key, pattern in TOKEN_PATTERNS.items()
     }
 
 
@@ -162,51 +285,54 @@ def main() -> int:
         return 2
 
     try:
-        raw_html = html_path.read_text(encoding="utf-8")
+        signals = collect_signals(html_path)
     except OSError as exc:
         print(json.dumps({"error": f"failed to read html: {exc}"}, ensure_ascii=True))
         return 2
 
-    inspector = DraftInspector()
-    inspector.feed(raw_html)
-
-    combined_css = "\n".join(inspector.inline_styles + inspector.style_blocks)
+    combined_css = "\n".join(signals.inline_styles + signals.style_blocks)
     tokens = extract_tokens(combined_css)
 
     repeated_classes = [
         {"class": cls, "count": count}
-        for cls, count in inspector.class_counter.most_common(30)
-        if count >= 2
+        for cls, count in nlargest(
+            30,
+            ((cls, count) for cls, count in signals.class_counter.items() if count >= 2),
+            key=itemgetter(1),
+        )
     ]
 
-    top_tags = [{"tag": tag, "count": count} for tag, count in inspector.tag_counter.most_common(15)]
+    top_tags = [
+        {"tag": tag, "count": count}
+        for tag, count in nlargest(15, signals.tag_counter.items(), key=itemgetter(1))
+    ]
     semantic_sections = [
-        {"tag": tag, "count": count} for tag, count in inspector.semantic_sections.most_common()
+        {"tag": tag, "count": count} for tag, count in signals.semantic_sections.most_common()
     ]
 
     output = {
         "html_path": str(html_path),
         "summary": {
-            "element_count": sum(inspector.tag_counter.values()),
-            "unique_tags": len(inspector.tag_counter),
+            "element_count": sum(signals.tag_counter.values()),
+            "unique_tags": len(signals.tag_counter),
             "top_tags": top_tags,
             "semantic_sections": semantic_sections,
-            "interactive_elements": len(inspector.interactive_elements),
+            "interactive_elements": len(signals.interactive_elements),
             "external_assets": {
-                "images": unique_limited(inspector.images, limit=50),
-                "stylesheets": unique_limited(inspector.stylesheets, limit=50),
-                "scripts": unique_limited(inspector.scripts, limit=50),
+                "images": unique_limited(signals.images, limit=50),
+                "stylesheets": unique_limited(signals.stylesheets, limit=50),
+                "scripts": unique_limited(signals.scripts, limit=50),
             },
         },
         "tokens": tokens,
         "structure": {
-            "root_children": inspector.root_children,
+            "root_children": signals.root_children,
             "repeated_classes": repeated_classes,
-            "sample_interactive": inspector.interactive_elements[:20],
+            "sample_interactive": signals.interactive_elements[:20],
         },
     }
 
-    print(json.dumps(output, ensure_ascii=True, indent=2))
+    print(dumps(output))
     return 0
 
 
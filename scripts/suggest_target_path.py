@@ -9,29 +9,31 @@ import re
 from pathlib import Path
 from typing import Dict, List
 
+from _fscache import FsSnapshot
+from _jsonio import dumps, load_package_json
+
+NON_ALNUM_RE = re.compile(r"[^a-zA-Z0-9]+")
+CAMEL_BOUNDARY_RE = re.compile(r"([a-z0-9])([A-Z])")
+
 
 def load_dependencies(project_root: Path) -> Dict[str, str]:
-    package_json = project_root / "package.json"
-    if not package_json.exists():
-        return {}
-    try:
-        data = json.loads(package_json.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
+    data = load_package_json(project_root)
+    if not isinstance(data, dict):
         return {}
 
     deps: Dict[str, str] = {}
     for key in ("dependencies", "devDependencies", "peerDependencies"):
-        block = data.get(key, {})
+        block = data.get(key)
         if isinstance(block, dict):
-            deps.update({str(k): str(v) for k, v in block.items()})
+            deps.update(block)
     return deps
 
 
-def infer_framework(project_root: Path, deps: Dict[str, str], framework_opt: str) -> str:
+def infer_framework(project_root: Path, fs: FsSnapshot, deps: Dict[str, str], framework_opt: str) -> str:
     if framework_opt != "auto":
         return framework_opt
 
-    dep_names = set(deps.keys())
+    dep_names = deps.keys()
     if "next" in dep_names:
         return "next"
     if "nuxt" in dep_names:
@@ -45,24 +47,24 @@ def infer_framework(project_root: Path, deps: Dict[str, str], framework_opt: str
     if "react" in dep_names:
         return "react"
 
-    if (project_root / "src/app").exists() or (project_root / "app").exists():
+    if fs.has(project_root / "src/app") or fs.has(project_root / "app"):
         return "next"
-    if (project_root / "pages").exists() and (project_root / "nuxt.config.ts").exists():
+    if fs.has(project_root / "pages") and fs.has(project_root / "nuxt.config.ts"):
         return "nuxt"
 
     return "vanilla"
 
 
-def infer_language(project_root: Path, language_opt: str) -> str:
+def infer_language(project_root: Path, fs: FsSnapshot, language_opt: str) -> str:
     if language_opt != "auto":
         return language_opt
-    if (project_root / "tsconfig.json").exists():
+    if fs.has(project_root / "tsconfig.json"):
         return "typescript"
     return "javascript"
 
 
 def to_pascal_case(value: str) -> str:
-    chunks = re.split(r"[^a-zA-Z0-9]+", value)
+    chunks = NON_ALNUM_RE.split(value)
     filtered = [chunk for chunk in chunks if chunk]
     if not filtered:
         return "RestoredDesign"
@@ -70,8 +72,8 @@ def to_pascal_case(value: str) -> str:
 
 
 def to_kebab_case(value: str) -> str:
-    replaced = re.sub(r"([a-z0-9])([A-Z])", r"\1-\2", value)
-    replaced = re.sub(r"[^a-zA-Z0-9]+", "-", replaced)
+    replaced = CAMEL_BOUNDARY_RE.sub(r"\1-\2", value)
+    replaced = NON_ALNUM_RE.sub("-", replaced)
     normalized = replaced.strip("-").lower()
     return normalized or "restored-design"
 
@@ -88,17 +90,19 @@ def choose_extension(framework: str, language: str) -> str:
     return "tsx" if language == "typescript" else "jsx"
 
 
-def default_path(project_root: Path, framework: str, scope: str, name: str, extension: str) -> Path:
+def default_path(
+    project_root: Path, fs: FsSnapshot, framework: str, scope: str, name: str, extension: str
+) -> Path:
     component_name = to_pascal_case(name)
     route_name = to_kebab_case(name)
 
     if framework == "next":
         if scope == "page":
-            if (project_root / "src/app").exists():
+            if fs.has(project_root / "src/app"):
                 return Path("src/app") / route_name / f"page.{extension}"
-            if (project_root / "app").exists():
+            if fs.has(project_root / "app"):
                 return Path("app") / route_name / f"page.{extension}"
-            if (project_root / "src/pages").exists():
+            if fs.has(project_root / "src/pages"):
                 return Path("src/pages") / f"{route_name}.{extension}"
             return Path("pages") / f"{route_name}.{extension}"
         return Path("src/components") / f"{component_name}.{extension}"
@@ -125,15 +129,15 @@ def default_path(project_root: Path, framework: str, scope: str, name: str, exte
 
     if framework == "svelte":
         if scope == "page":
-            if (project_root / "src/routes").exists():
+            if fs.has(project_root / "src/routes"):
                 return Path("src/routes") / route_name / "+page.svelte"
             return Path("src/pages") / f"{route_name}.svelte"
-        if (project_root / "src/lib").exists():
+        if fs.has(project_root / "src/lib"):
             return Path("src/lib") / f"{component_name}.svelte"
         return Path("src/components") / f"{component_name}.svelte"
 
     if scope == "page":
-        if (project_root / "src/pages").exists():
+        if fs.has(project_root / "src/pages"):
             return Path("src/pages") / f"{route_name}.html"
         return Path("pages") / f"{route_name}.html"
 
@@ -179,9 +183,11 @@ def main() -> int:
         print(json.dumps({"error": f"project root not found: {project_root}"}, ensure_ascii=True))
         return 2
 
+    fs = FsSnapshot()
+
     deps = load_dependencies(project_root)
-    framework = infer_framework(project_root, deps, args.framework)
-    language = infer_language(project_root, args.language)
+    framework = infer_framework(project_root, fs, deps, args.framework)
+    language = infer_language(project_root, fs, args.language)
     extension = choose_extension(framework, language)
 
     scope = args.scope
@@ -211,7 +217,7 @@ def main() -> int:
             suggested_abs = project_root / suggested_rel
         reasoning.append("explicit target path provided")
     else:
-        suggested_rel = default_path(project_root, framework, normalized_scope, args.name, extension)
+        suggested_rel = default_path(project_root, fs, framework, normalized_scope, args.name, extension)
         suggested_abs = project_root / suggested_rel
         reasoning.append(f"target path suggested from framework={framework} scope={normalized_scope}")
 
@@ -244,7 +250,7 @@ def main() -> int:
         "reasoning": reasoning,
     }
 
-    print(json.dumps(output, ensure_ascii=True, indent=2))
+    print(dumps(output))
     return 0
 
 